@@ -5,10 +5,15 @@
 
 """Istio Beacon Charm."""
 
+import functools
 import hashlib
+import json
 import logging
+import signal
 import time
-from typing import Dict, List
+from concurrent.futures import FIRST_EXCEPTION, ThreadPoolExecutor, wait
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Type, cast
 
 import ops
 import pydantic
@@ -22,33 +27,31 @@ from lightkube.generic_resource import create_namespaced_resource
 from lightkube.models.meta_v1 import ObjectMeta
 from lightkube.resources.apps_v1 import Deployment
 from lightkube.resources.core_v1 import Namespace
-from lightkube_extensions.batch import KubernetesResourceManager, create_charm_default_labels
+from lightkube.types import PatchType
+from lightkube_extensions.batch import (
+    KubernetesResourceManager,
+    create_charm_default_labels,
+)
 from ops.model import ActiveStatus, BlockedStatus, MaintenanceStatus
 from ops.pebble import ChangeError, Layer
 
 from models import (
     AllowedRoutes,
     AuthorizationPolicySpec,
-    From,
     IstioWaypointResource,
     IstioWaypointSpec,
     Listener,
     Metadata,
-    Operation,
-    PolicyTargetReference,
     Rule,
-    Source,
-    To,
     WorkloadSelector,
 )
 
 logger = logging.getLogger(__name__)
 
-RESOURCE_TYPES = {
-    "Gateway": create_namespaced_resource(
-        "gateway.networking.k8s.io", "v1", "Gateway", "gateways"
-    ),
-    "AuthorizationPolicy": create_namespaced_resource(
+# Arguments to create_namespaced_resource for each custom resource kind this charm manages
+RESOURCE_TYPE_DEFINITIONS = {
+    "Gateway": ("gateway.networking.k8s.io", "v1", "Gateway", "gateways"),
+    "AuthorizationPolicy": (
         "security.istio.io",
         "v1",
         "AuthorizationPolicy",
@@ -56,10 +59,81 @@ RESOURCE_TYPES = {
     ),
 }
 
+
+@functools.lru_cache(maxsize=None)
+def _resource_type(kind: str):
+    """Return the lightkube resource class for a custom resource kind, creating it on first use."""
+    return create_namespaced_resource(*RESOURCE_TYPE_DEFINITIONS[kind])
+
+
 AUTHORIZATION_POLICY_LABEL = "istio-authorization-policy"
-AUTHORIZATION_POLICY_RESOURCE_TYPES = {RESOURCE_TYPES["AuthorizationPolicy"]}
 WAYPOINT_LABEL = "istio-waypoint"
-WAYPOINT_RESOURCE_TYPES = {RESOURCE_TYPES["Gateway"]}
+# How long (in seconds) a reconcile with unchanged inputs is skipped for, after which resources changed out-of-band are
+# re-applied
+RECONCILE_CACHE_SECONDS = 300
+# How long (in seconds) an unchanged waypoint that was confirmed to be ready is trusted to still be ready
+WAYPOINT_READY_CACHE_SECONDS = 300
+# Labels this charm sets on its namespace to put the model on the mesh
+WAYPOINT_NAMESPACE_LABELS = (
+    "istio.io/use-waypoint",
+    "istio.io/dataplane-mode",
+    "charms.canonical.com/istio.io.waypoint.managed-by",
+)
+WAYPOINT_LISTENERS = [
+    Listener(
+        name="mesh",
+        port=15008,
+        protocol="HBONE",
+        allowedRoutes=AllowedRoutes(namespaces={"from": "All"}),
+    )
+]
+# Allows the juju controller to talk to the model operator when the model is on the mesh
+MODEL_OPERATOR_AUTHORIZATION_POLICY_SPEC = AuthorizationPolicySpec(
+    selector=WorkloadSelector(matchLabels={"operator.juju.is/name": "modeloperator"}),
+    rules=[Rule()],
+)
+
+
+class ConcurrentKubernetesResourceManager(KubernetesResourceManager):
+    """A KubernetesResourceManager that patches resources concurrently.
+
+    Only `patch` is overridden, so `reconcile` (including its delete step and error handling) is inherited unchanged.
+    Resources are split into up to `max_workers` batches that are patched in parallel, so this should only be used for
+    resources that do not depend on each other being created in a particular order (for example, a set of
+    AuthorizationPolicies).
+    """
+
+    def __init__(self, *args, max_workers: int = 10, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.max_workers = max_workers
+
+    def patch(
+        self,
+        resources,
+        force: bool = True,
+        patch_type: PatchType = PatchType.APPLY,
+    ):
+        """Patch the given resources, patching up to `max_workers` batches of them concurrently."""
+        resources = list(resources)
+        batches = [resources[i :: self.max_workers] for i in range(self.max_workers)]
+        batches = [batch for batch in batches if batch]
+        if len(batches) <= 1:
+            return super().patch(resources, force=force, patch_type=patch_type)
+
+        patch = super().patch
+        with ThreadPoolExecutor(max_workers=len(batches)) as executor:
+            futures = [
+                executor.submit(patch, batch, force=force, patch_type=patch_type)
+                for batch in batches
+            ]
+            done, not_done = wait(futures, return_when=FIRST_EXCEPTION)
+            for future in not_done:
+                future.cancel()
+
+        for future in done:
+            exception = future.exception()
+            if exception is not None:
+                raise exception
 
 
 @trace_charm(
@@ -71,16 +145,22 @@ WAYPOINT_RESOURCE_TYPES = {RESOURCE_TYPES["Gateway"]}
 class IstioBeaconCharm(ops.CharmBase):
     """Charm the service."""
 
+    _stored = ops.StoredState()
+
     def __init__(self, *args):
         super().__init__(*args)
+        # Fingerprint of the inputs to the last successful _sync_all_resources, and when (wall clock) it finished, used
+        # to skip no-op reconciles
+        self._stored.set_default(reconcile_fingerprint=None, reconciled_at=0.0)
+        # Fingerprint of the last waypoint confirmed to be ready, and when (wall clock) that was confirmed
+        self._stored.set_default(waypoint_fingerprint=None, waypoint_ready_at=0.0)
 
         self._lightkube_field_manager: str = self.app.name
-        self._lightkube_client = None
-        self._app_identity = f"{self.app.name}-{self.model.name}"
 
         self._telemetry_labels = {
             f"charms.canonical.com/{self.model.name}.{self.app.name}.telemetry": "aggregated"
         }
+        self._telemetry_labels_str = self.format_labels(self._telemetry_labels)
         # Configure Observability
         self._scraping = MetricsEndpointProvider(
             self,
@@ -98,10 +178,12 @@ class IstioBeaconCharm(ops.CharmBase):
 
         self.framework.observe(self.on.config_changed, self._on_config_changed)
         self.framework.observe(self.on.remove, self._on_remove)
+        self.framework.observe(self.on.upgrade_charm, self._on_upgrade_charm)
         self.framework.observe(
             self.on.metrics_proxy_pebble_ready, self._metrics_proxy_pebble_ready
         )
         self._mesh = ServiceMeshProvider(self, labels=self.mesh_labels())
+        self._mesh_info: Optional[List[MeshPolicy]] = None
 
         self.framework.observe(self.on["service-mesh"].relation_changed, self.on_mesh_changed)
         self.framework.observe(self.on["service-mesh"].relation_broken, self.on_mesh_broken)
@@ -119,7 +201,7 @@ class IstioBeaconCharm(ops.CharmBase):
                     "metrics-proxy": {
                         "override": "replace",
                         "summary": "Metrics Broadcast Proxy",
-                        "command": f"metrics-proxy --labels {self.format_labels(self._telemetry_labels)}",
+                        "command": f"metrics-proxy --labels {self._telemetry_labels_str}",
                         "startup": "enabled",
                     }
                 },
@@ -149,32 +231,40 @@ class IstioBeaconCharm(ops.CharmBase):
         """Event handler for service-mesh relation_broken."""
         self._sync_all_resources()
 
+    def _on_upgrade_charm(self, _):
+        """Event handler for upgrade charm."""
+        # A new charm revision may render resources differently from the same inputs, so force the next reconcile
+        self._stored.reconcile_fingerprint = None
+        self._stored.waypoint_fingerprint = None
+
     def _on_remove(self, _):
         """Event handler for remove."""
-        self._remove_labels()
+        self._reconcile_namespace_labels(desired=False)
         for krm in (
             self._get_waypoint_resource_manager(),
             self._get_authorization_policy_resource_manager(),
         ):
             krm.delete()
 
-    @property
+    @functools.cached_property
     def lightkube_client(self):
         """Returns a lightkube client configured for this charm."""
-        if self._lightkube_client is None:
-            self._lightkube_client = Client(
-                namespace=self.model.name, field_manager=self._lightkube_field_manager
-            )
-        return self._lightkube_client
+        return Client(namespace=self.model.name, field_manager=self._lightkube_field_manager)
+
+    @functools.cached_property
+    def _app_identity(self) -> str:
+        """Returns the identity this charm records as the manager of the namespace labels."""
+        return f"{self.app.name}-{self.model.name}"
 
     def _get_authorization_policy_resource_manager(self):
-        return KubernetesResourceManager(
+        return ConcurrentKubernetesResourceManager(
             labels=create_charm_default_labels(
                 self.app.name, self.model.name, scope=AUTHORIZATION_POLICY_LABEL
             ),
-            resource_types=AUTHORIZATION_POLICY_RESOURCE_TYPES,  # pyright: ignore
+            resource_types={_resource_type("AuthorizationPolicy")},  # pyright: ignore
             lightkube_client=self.lightkube_client,
             logger=logger,
+            max_workers=max(int(self.config["reconcile-concurrency"]), 1),
         )
 
     def _get_waypoint_resource_manager(self):
@@ -182,34 +272,60 @@ class IstioBeaconCharm(ops.CharmBase):
             labels=create_charm_default_labels(
                 self.app.name, self.model.name, scope=WAYPOINT_LABEL
             ),
-            resource_types=WAYPOINT_RESOURCE_TYPES,  # pyright: ignore
+            resource_types={_resource_type("Gateway")},  # pyright: ignore
             lightkube_client=self.lightkube_client,
             logger=logger,
         )
 
     def _is_waypoint_deployment_ready(self) -> bool:
-        """Check if the deployment is ready after 10 attempts."""
-        timeout = int(self.config["ready-timeout"])
-        check_interval = 10
-        attempts = timeout // check_interval
+        """Wait for the waypoint deployment to be ready, for up to `ready-timeout` seconds.
+
+        Rather than polling, this watches the deployment so that readiness is observed as soon as it happens.  The
+        watch's initial ADDED event covers the case where the deployment is already ready.
+        """
+        timeout = max(int(self.config["ready-timeout"]), 1)
 
-        for _ in range(attempts):
+        watch = None
+        try:
+            with _deadline(timeout):
+                while True:
+                    watch = self.lightkube_client.watch(
+                        Deployment,
+                        namespace=self.model.name,
+                        fields={"metadata.name": self._waypoint_name},
+                        server_timeout=timeout,
+                    )
+                    try:
+                        for event_type, deployment in watch:
+                            if event_type != "DELETED" and _is_deployment_ready(deployment):
+                                return True
+                            logger.info("Deployment not ready, waiting...")
+                        break
+                    except ApiError as e:
+                        # lightkube raises ERROR events from the stream rather than handling them.  A 410 Gone means
+                        # the resourceVersion we were watching from is too old to resume from, so restart the watch,
+                        # which begins by reporting the deployment's current state.
+                        if e.status.code != 410:
+                            raise
+                        logger.info("Deployment watch expired, restarting it.")
+        except _DeadlineExceededError:
+            logger.info(f"Deployment not ready after {timeout} seconds.")
+        except (ApiError, _HTTPStatusError) as e:
+            # Fall back to a single check if we're unable to watch the deployment
+            logger.info(f"Unable to watch deployment ({e}), checking it once instead.")
             try:
                 deployment = self.lightkube_client.get(
                     Deployment,
                     name=self._waypoint_name,
                     namespace=self.model.name,
                 )
-                if (
-                    deployment.status
-                    and deployment.status.readyReplicas == deployment.status.replicas
-                ):
-                    return True
-                logger.info("Deployment not ready, retrying...")
+                return _is_deployment_ready(deployment)
             except ApiError:
-                logger.info("Deployment not found, retrying...")
-
-            time.sleep(check_interval)
+                logger.info("Deployment not found.")
+        finally:
+            # Close the watch's streaming response rather than leaving it open until the generator is collected
+            if watch is not None:
+                watch.close()
 
         return False
 
@@ -223,97 +339,138 @@ class IstioBeaconCharm(ops.CharmBase):
             self.unit.status = BlockedStatus("Waypoint can only be provided on the leader unit.")
             return
 
+        fingerprint = self._reconcile_fingerprint()
+        if (
+            fingerprint == self._stored.reconcile_fingerprint
+            and isinstance(self.unit.status, ActiveStatus)
+            and time.time() - self._stored.reconciled_at < RECONCILE_CACHE_SECONDS
+        ):
+            logger.debug(
+                "Inputs unchanged since the last reconcile - skipping Kubernetes resource sync."
+            )
+            # The Pebble layer is not part of the fingerprint and is lost if the workload container restarts, so
+            # always (idempotently) make sure it is in place
+            self._setup_proxy_pebble_service()
+            return
+
         self.unit.status = MaintenanceStatus("Validating waypoint readiness")
-        self._sync_waypoint_resources()
-        if not self._is_waypoint_ready():
-            raise RuntimeError("Waypoint's k8s deployment not ready, is istio properly installed?")
+        waypoint_fingerprint = self._sync_waypoint_resources()
+        if waypoint_fingerprint is not None:
+            if not self._is_waypoint_ready():
+                raise RuntimeError(
+                    "Waypoint's k8s deployment not ready, is istio properly installed?"
+                )
+            self._stored.waypoint_fingerprint = waypoint_fingerprint
+            self._stored.waypoint_ready_at = time.time()
 
         self._setup_proxy_pebble_service()
 
         self.unit.status = MaintenanceStatus("Updating AuthorizationPolicies")
         self._sync_authorization_policies()
 
+        self._stored.reconcile_fingerprint = fingerprint
+        self._stored.reconciled_at = time.time()
         self.unit.status = ActiveStatus()
 
+    def _get_mesh_info(self) -> List[MeshPolicy]:
+        """Return the MeshPolicies requested by related applications.
+
+        Relation data cannot change during a dispatch, so this is only read from the relations once.
+        """
+        if self._mesh_info is None:
+            self._mesh_info = self._mesh.mesh_info()
+        return self._mesh_info
+
+    def _reconcile_fingerprint(self) -> str:
+        """Return a fingerprint of all the inputs that _sync_all_resources renders resources from."""
+        inputs = {
+            "cfg": dict(self.model.config),
+            "labels": self._telemetry_labels,
+        }
+        # The mesh only affects the AuthorizationPolicies, so avoid reading the relation data when they're disabled
+        if self.config["manage-authorization-policies"]:
+            inputs["mesh"] = [policy.model_dump(mode="json") for policy in self._get_mesh_info()]
+        return hashlib.blake2b(
+            json.dumps(inputs, sort_keys=True).encode(), digest_size=16
+        ).hexdigest()
+
     def _build_authorization_policies(self, mesh_info: List[MeshPolicy]):
         """Build all managed authorization policies."""
-        authorization_policies = [None] * len(mesh_info)
-        for i, policy in enumerate(mesh_info):
-            target_service = policy.target_service or policy.target_app_name
-            if policy.target_service is None:
-                logger.info(
-                    f"Got policy for application '{policy.target_app_name}' that has no target_service. "
-                    f"Defaulting to application name '{target_service}'."
-                )
-
-            authorization_policies[i] = RESOURCE_TYPES["AuthorizationPolicy"](  # type: ignore
-                metadata=ObjectMeta(
-                    name=self._generate_authorization_policy_name(policy),
-                    # FIXME: This should be the namespace of the target app, not the beacon
-                    namespace=self.model.name,
-                ),
-                spec=AuthorizationPolicySpec(
-                    targetRefs=[
-                        PolicyTargetReference(
-                            kind="Service",
-                            group="",
-                            name=target_service,
-                        )
-                    ],
-                    rules=[
-                        Rule(
-                            from_=[  # type: ignore # this is accessible via an alias
-                                From(
-                                    source=Source(
-                                        principals=[
-                                            _get_peer_identity_for_juju_application(
-                                                policy.source_app_name, self.model.name
-                                            )
-                                        ]
-                                    )
-                                )
-                            ],
-                            to=[
-                                To(
-                                    operation=Operation(
-                                        # TODO: Make these ports strings instead of ints in endpoint?
-                                        ports=[str(p) for p in endpoint.ports]
-                                        if endpoint.ports
-                                        else [],
-                                        hosts=endpoint.hosts,
-                                        methods=endpoint.methods,
-                                        paths=endpoint.paths,
-                                    )
-                                )
-                                for endpoint in policy.endpoints
-                            ],
-                        )
-                    ],
-                    # by_alias=True because the model includes an alias for the `from` field
-                    # exclude_unset=True because unset fields will be treated as their default values in Kubernetes
-                    # exclude_none=True because null values in this data always mean the Kubernetes default
-                ).model_dump(by_alias=True, exclude_unset=True, exclude_none=True),
-            )
+        authorization_policies = [self._build_authorization_policy(policy) for policy in mesh_info]
 
         # We need to allow the juju controller to be able to talk to the model operator
         if self.config["model-on-mesh"]:
             authorization_policies.append(
-                RESOURCE_TYPES["AuthorizationPolicy"](  # type: ignore
+                _resource_type("AuthorizationPolicy")(  # type: ignore
                     metadata=ObjectMeta(
                         name=f"{self.app.name}-{self.model.name}-policy-all-sources-modeloperator",
                         namespace=self.model.name,
                     ),
-                    spec=AuthorizationPolicySpec(
-                        selector=WorkloadSelector(
-                            matchLabels={"operator.juju.is/name": "modeloperator"}
-                        ),
-                        rules=[Rule()],
-                    ).model_dump(by_alias=True, exclude_unset=True, exclude_none=True),
+                    spec=MODEL_OPERATOR_AUTHORIZATION_POLICY_SPEC.model_dump(
+                        by_alias=True, exclude_unset=True, exclude_none=True
+                    ),
                 )
             )
 
         return authorization_policies
 
+    def _build_authorization_policy(self, policy: MeshPolicy):
+        """Build the authorization policy for a single MeshPolicy."""
+        target_service = policy.target_service or policy.target_app_name
+        if policy.target_service is None:
+            logger.info(
+                f"Got policy for application '{policy.target_app_name}' that has no target_service. "
+                f"Defaulting to application name '{target_service}'."
+            )
+
+        return _resource_type("AuthorizationPolicy")(  # type: ignore
+            metadata=ObjectMeta(
+                name=self._generate_authorization_policy_name(policy),
+                # FIXME: This should be the namespace of the target app, not the beacon
+                namespace=self.model.name,
+            ),
+            spec=self._build_authorization_policy_spec(policy, target_service),
+        )
+
+    def _build_authorization_policy_spec(self, policy: MeshPolicy, target_service: str) -> dict:
+        """Build the spec of the authorization policy for a single MeshPolicy.
+
+        This builds the dict directly rather than through AuthorizationPolicySpec because it runs for every policy on
+        every reconcile.  The output must match what
+        AuthorizationPolicySpec(...).model_dump(by_alias=True, exclude_unset=True, exclude_none=True) would give, which
+        means omitting any unset or None fields because they always mean the Kubernetes default.
+        """
+        # Everything except the operations depends only on the policy, not on its endpoints
+        principal = _get_peer_identity_for_juju_application(
+            policy.source_app_name, self.model.name
+        )
+        target_refs = [{"group": "", "kind": "Service", "name": target_service}]
+        sources = [{"source": {"principals": [principal]}}]
+        return {
+            "targetRefs": target_refs,
+            "rules": [
+                {
+                    "from": sources,
+                    "to": [
+                        {
+                            "operation": {
+                                key: value
+                                for key, value in (
+                                    ("hosts", endpoint.hosts),
+                                    # TODO: Make these ports strings instead of ints in endpoint?
+                                    ("ports", list(map(str, endpoint.ports or ()))),
+                                    ("methods", endpoint.methods),
+                                    ("paths", endpoint.paths),
+                                )
+                                if value is not None
+                            }
+                        }
+                        for endpoint in policy.endpoints
+                    ],
+                }
+            ],
+        }
+
     def _construct_waypoint(self):
         gateway = IstioWaypointResource(
             metadata=Metadata(
@@ -323,17 +480,10 @@ class IstioBeaconCharm(ops.CharmBase):
             ),
             spec=IstioWaypointSpec(
                 gatewayClassName="istio-waypoint",
-                listeners=[
-                    Listener(
-                        name="mesh",
-                        port=15008,
-                        protocol="HBONE",
-                        allowedRoutes=AllowedRoutes(namespaces={"from": "All"}),
-                    )
-                ],
+                listeners=WAYPOINT_LISTENERS,
             ),
         )
-        gateway_resource = RESOURCE_TYPES["Gateway"]
+        gateway_resource = _resource_type("Gateway")
         return gateway_resource(
             metadata=ObjectMeta.from_dict(gateway.metadata.model_dump()),
             spec=gateway.spec.model_dump(),
@@ -343,7 +493,7 @@ class IstioBeaconCharm(ops.CharmBase):
         """Sync authorization policies."""
         krm = self._get_authorization_policy_resource_manager()
         if self.config["manage-authorization-policies"]:
-            authorization_policies = self._build_authorization_policies(self._mesh.mesh_info())
+            authorization_policies = self._build_authorization_policies(self._get_mesh_info())
             logger.debug("Reconciling state of AuthorizationPolicies to:")
             logger.debug(authorization_policies)
         else:
@@ -355,17 +505,29 @@ class IstioBeaconCharm(ops.CharmBase):
             authorization_policies = []
         krm.reconcile(authorization_policies)  # type: ignore
 
-    def _sync_waypoint_resources(self):
-        resources_list = []
-        krm = self._get_waypoint_resource_manager()
-        resource_to_append = self._construct_waypoint()
-        resources_list.append(resource_to_append)
-        krm.reconcile(resources_list)
+    def _sync_waypoint_resources(self) -> Optional[str]:
+        """Sync the waypoint and the namespace labels.
 
-        if self.config["model-on-mesh"]:
-            self._add_labels()
+        Returns the fingerprint of the waypoint if it was applied and its readiness needs to be checked, or None if
+        applying it was skipped because it is unchanged and was recently confirmed to be ready.
+        """
+        waypoint = self._construct_waypoint()
+        fingerprint = hashlib.blake2b(
+            json.dumps(waypoint.to_dict(), sort_keys=True).encode(), digest_size=16
+        ).hexdigest()
+        if (
+            fingerprint == self._stored.waypoint_fingerprint
+            and time.time() - self._stored.waypoint_ready_at < WAYPOINT_READY_CACHE_SECONDS
+        ):
+            logger.debug("Waypoint unchanged and recently ready - skipping waypoint sync.")
+            fingerprint = None
         else:
-            self._remove_labels()
+            krm = self._get_waypoint_resource_manager()
+            krm.reconcile([waypoint])
+
+        self._reconcile_namespace_labels(desired=bool(self.config["model-on-mesh"]))
+
+        return fingerprint
 
     def _get_namespace(self):
         """Retrieve the namespace object."""
@@ -375,72 +537,65 @@ class IstioBeaconCharm(ops.CharmBase):
             logger.error(f"Error fetching namespace: {e}")
             return None
 
-    def _patch_namespace(self, namespace):
-        """Patch the namespace with updated labels."""
+    def _patch_namespace(self, labels_delta: Dict[str, Optional[str]]):
+        """Patch the namespace's labels with a merge patch, where a label set to None is removed."""
         try:
-            self.lightkube_client.patch(Namespace, self.model.name, namespace)
+            self.lightkube_client.patch(
+                Namespace,
+                self.model.name,
+                {"metadata": {"labels": labels_delta}},
+                patch_type=PatchType.MERGE,
+            )
         except ApiError as e:
             logger.error(f"Error patching namespace: {e}")
 
-    def _add_labels(self):
-        """Add specific labels to the namespace."""
+    def _reconcile_namespace_labels(self, desired: bool):
+        """Add (if desired) or remove (if not desired) this charm's Istio labels on the namespace.
+
+        The namespace is read once and at most one merge patch is sent, containing only the labels that change.
+        Istio labels managed by another entity are left untouched.
+        """
         namespace = self._get_namespace()
         if not namespace:
             raise RuntimeError(f"Error fetching namespace: {namespace}")
 
-        # Ensure metadata is not None
-        if namespace.metadata is None:
-            namespace.metadata = ObjectMeta()
-
-        # Ensure labels are a dictionary even if they are initially None or not set
-        if namespace.metadata.labels is None:  # pyright: ignore
-            namespace.metadata.labels = {}  # pyright: ignore
-
-        existing_labels = namespace.metadata.labels  # pyright: ignore
-        if (
-            existing_labels.get("istio.io/use-waypoint")
-            or existing_labels.get("istio.io/dataplane-mode")
-        ) and existing_labels.get(
-            "charms.canonical.com/istio.io.waypoint.managed-by"
-        ) != f"{self._app_identity}":
-            logger.error(
-                f"Cannot add labels: Namespace '{self.model.name}' is already configured with Istio labels managed by another entity."
-            )
-            return
+        existing_labels = (namespace.metadata and namespace.metadata.labels) or {}
+        if desired:
+            target_labels = {
+                "istio.io/use-waypoint": self._waypoint_name,
+                "istio.io/dataplane-mode": "ambient",
+                "charms.canonical.com/istio.io.waypoint.managed-by": f"{self._app_identity}",
+            }
+        else:
+            target_labels = dict.fromkeys(WAYPOINT_NAMESPACE_LABELS)
 
-        labels_to_add = {
-            "istio.io/use-waypoint": self._waypoint_name,
-            "istio.io/dataplane-mode": "ambient",
-            "charms.canonical.com/istio.io.waypoint.managed-by": f"{self._app_identity}",
+        labels_delta = {
+            key: value for key, value in target_labels.items() if existing_labels.get(key) != value
         }
+        if not labels_delta:
+            logger.debug(f"Namespace '{self.model.name}' Istio labels are already up to date.")
+            return
 
-        namespace.metadata.labels.update(labels_to_add)  # pyright: ignore
-        self._patch_namespace(namespace)
-
-    def _remove_labels(self):
-        """Remove specific labels from the namespace."""
-        namespace = self._get_namespace()
-        if not namespace:
-            raise RuntimeError(f"Error fetching namespace: {namespace}")
-
-        if namespace.metadata and namespace.metadata.labels:
+        managed_by_us = (
+            existing_labels.get("charms.canonical.com/istio.io.waypoint.managed-by")
+            == f"{self._app_identity}"
+        )
+        if desired:
             if (
-                namespace.metadata.labels.get("charms.canonical.com/istio.io.waypoint.managed-by")
-                != f"{self._app_identity}"
-            ):
-                logger.warning(
-                    f"Cannot remove labels: Namespace '{self.model.name}' has Istio labels managed by another entity."
+                existing_labels.get("istio.io/use-waypoint")
+                or existing_labels.get("istio.io/dataplane-mode")
+            ) and not managed_by_us:
+                logger.error(
+                    f"Cannot add labels: Namespace '{self.model.name}' is already configured with Istio labels managed by another entity."
                 )
                 return
+        elif not managed_by_us:
+            logger.warning(
+                f"Cannot remove labels: Namespace '{self.model.name}' has Istio labels managed by another entity."
+            )
+            return
 
-            labels_to_remove = {
-                "istio.io/use-waypoint": None,
-                "istio.io/dataplane-mode": None,
-                "charms.canonical.com/istio.io.waypoint.managed-by": None,
-            }
-
-            namespace.metadata.labels.update(labels_to_remove)
-            self._patch_namespace(namespace)
+        self._patch_namespace(labels_delta)
 
     def mesh_labels(self):
         """Labels required for a workload to join the mesh."""
@@ -462,34 +617,31 @@ class IstioBeaconCharm(ops.CharmBase):
         """
         # omit target_app_namespace from the name here because that will be the namespace the policy is generated in, so
         # adding it here is redundant
-        name = "-".join(
-            [
-                self.app.name,
-                self.model.name,
-                "policy",
-                mesh_policy.source_app_name,
-                mesh_policy.source_namespace,
-                mesh_policy.target_app_name,
-                _hash_pydantic_model(mesh_policy)[:8],
-            ]
+        parts = [
+            mesh_policy.source_app_name,
+            mesh_policy.source_namespace,
+            mesh_policy.target_app_name,
+        ]
+        policy_hash = _hash_pydantic_model(mesh_policy)
+        # Length of the joined name, including the four separators around the parts
+        name_length = (
+            len(self._authorization_policy_name_prefix)
+            + sum(len(part) for part in parts)
+            + len(policy_hash)
+            + 4
         )
-        if len(name) > 253:
+        if name_length > 253:
             # Truncate the name to fit within Kubernetes's 253-character limit
             # juju app names and models must be <= 63 characters each and we have ~20 characters of static text, so
             # if name is too long just take the first 30 characters of source_app_name, source_namespace, and
             # target_app_name to be safe.
-            name = "-".join(
-                [
-                    self.app.name,
-                    self.model.name,
-                    "policy",
-                    mesh_policy.source_app_name[:30],
-                    mesh_policy.source_namespace[:30],
-                    mesh_policy.target_app_name[:30],
-                    _hash_pydantic_model(mesh_policy)[:8],
-                ]
-            )
-        return name
+            parts = [part[:30] for part in parts]
+        return "-".join([self._authorization_policy_name_prefix, *parts, policy_hash])
+
+    @functools.cached_property
+    def _authorization_policy_name_prefix(self) -> str:
+        """Return the static prefix of the names generated by _generate_authorization_policy_name."""
+        return f"{self.app.name}-{self.model.name}-policy"
 
     @staticmethod
     def format_labels(label_dict: Dict[str, str]) -> str:
@@ -520,19 +672,53 @@ def _get_peer_identity_for_service_account(service_account, namespace):
     return f"cluster.local/ns/{namespace}/sa/{service_account}"
 
 
-def _hash_pydantic_model(model: pydantic.BaseModel) -> str:
-    """Hash a pydantic BaseModel object.
+def _is_deployment_ready(deployment: Deployment) -> bool:
+    """Return True if all replicas of a Deployment are ready."""
+    return bool(
+        deployment.status and deployment.status.readyReplicas == deployment.status.replicas
+    )
+
+
+# lightkube raises this, rather than ApiError, when the API server rejects a watch request outright.  It is taken from
+# ApiError (which subclasses it) so that it matches whichever httpx package lightkube is built on.
+_HTTPStatusError = cast(Type[Exception], ApiError.__base__)
+
+
+class _DeadlineExceededError(Exception):
+    """Raised by `_deadline` when its time limit is reached."""
+
 
-    This is a simple hashing of the json model dump of the pydantic model.  Items that are excluded from this dump will
-    will not affect the output.
+@contextmanager
+def _deadline(seconds: int):
+    """Raise _DeadlineExceededError in the main thread if the wrapped block runs for longer than `seconds`.
+
+    This lets us bound blocking calls, such as a Kubernetes watch, that do not expose a client-side timeout of their
+    own.
     """
 
-    def _stable_hash(data):
-        return hashlib.sha256(str(data).encode()).hexdigest()
+    def _on_alarm(_signum, _frame):
+        raise _DeadlineExceededError()
+
+    previous_handler = signal.signal(signal.SIGALRM, _on_alarm)
+    signal.setitimer(signal.ITIMER_REAL, seconds)
+    try:
+        yield
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous_handler)
+
 
-    # Note: This hash will be affected by changes in how pydandic stringifies data, so if they change things our hash
-    # will change too.  If that proves an issue, we could implement something more controlled here.
-    return _stable_hash(model)
+def _hash_pydantic_model(model: pydantic.BaseModel) -> str:
+    """Hash a pydantic BaseModel object, returning 8 hex characters.
+
+    This is a BLAKE2b hash of the json model dump of the pydantic model.  Items that are excluded from this dump will
+    not affect the output.
+    """
+    # Note: This hash will be affected by changes in how pydantic dumps data to json, so if they change things our
+    # hash will change too.  If that proves an issue, we could implement something more controlled here.
+    # The model's own serializer gives the same bytes as model_dump_json().encode() (including by_alias=False), without
+    # the round trip through str
+    return hashlib.blake2b(model.__pydantic_serializer__.to_json(model), digest_size=4).hexdigest()
 
 
 if __name__ == "__main__":
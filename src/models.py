@@ -11,8 +11,14 @@ from charms.istio_beacon_k8s.v0.service_mesh import Method
 from pydantic import BaseModel, ConfigDict, Field, model_validator
 
 
+class FrozenModel(BaseModel):
+    """Base for the immutable value objects in this module."""
+
+    model_config = ConfigDict(frozen=True, extra="forbid", populate_by_name=True)
+
+
 # Global metadata schema
-class Metadata(BaseModel):
+class Metadata(FrozenModel):
     """Global metadata schema for Kubernetes resources."""
 
     name: str
@@ -21,13 +27,13 @@ class Metadata(BaseModel):
     annotations: Optional[Dict[str, str]] = None
 
 
-class AllowedRoutes(BaseModel):
+class AllowedRoutes(FrozenModel):
     """AllowedRoutes defines namespaces from which traffic is allowed."""
 
     namespaces: Dict[str, str]
 
 
-class Listener(BaseModel):
+class Listener(FrozenModel):
     """Listener defines a port and protocol configuration."""
 
     name: str
@@ -36,14 +42,14 @@ class Listener(BaseModel):
     allowedRoutes: AllowedRoutes  # noqa: N815
 
 
-class IstioWaypointSpec(BaseModel):
+class IstioWaypointSpec(FrozenModel):
     """IstioWaypointSpec defines the specification of a waypoint."""
 
     gatewayClassName: str  # noqa: N815
     listeners: List[Listener]
 
 
-class IstioWaypointResource(BaseModel):
+class IstioWaypointResource(FrozenModel):
     """IstioWaypointResource defines the structure of an waypoint Kubernetes resource."""
 
     metadata: Metadata
@@ -60,7 +66,7 @@ class Action(str, Enum):
     # custom = "CUSTOM"
 
 
-class PolicyTargetReference(BaseModel):
+class PolicyTargetReference(FrozenModel):
     """PolicyTargetReference defines the target of the policy for waypoint bound policies."""
 
     group: str
@@ -69,13 +75,13 @@ class PolicyTargetReference(BaseModel):
     namespace: Optional[str] = None
 
 
-class WorkloadSelector(BaseModel):
+class WorkloadSelector(FrozenModel):
     """WorkloadSelector defines the target of the policy for ztunnel bound policies."""
 
     matchLabels: Dict[str, str]
 
 
-class Source(BaseModel):
+class Source(FrozenModel):
     """Source defines the source of the policy."""
 
     principals: Optional[List[str]] = None
@@ -83,13 +89,13 @@ class Source(BaseModel):
     # Did not model everything.
 
 
-class From(BaseModel):
+class From(FrozenModel):
     """From defines the source of the policy."""
 
     source: Source
 
 
-class Operation(BaseModel):
+class Operation(FrozenModel):
     """Operation defines the operation of the To model."""
 
     hosts: Optional[List[str]] = None
@@ -101,13 +107,13 @@ class Operation(BaseModel):
     notPaths: Optional[List[str]] = None
 
 
-class To(BaseModel):
+class To(FrozenModel):
     """To defines the destination of the policy."""
 
     operation: Optional[Operation] = None
 
 
-class Condition(BaseModel):
+class Condition(FrozenModel):
     """Condition defines the condition for the rule."""
 
     key: str
@@ -115,7 +121,7 @@ class Condition(BaseModel):
     notValues: Optional[List[str]] = None
 
 
-class Rule(BaseModel):
+class Rule(FrozenModel):
     """Rule defines a policy rule."""
 
     from_: Optional[List[From]] = Field(default=None, alias="from")
@@ -126,7 +132,7 @@ class Rule(BaseModel):
     model_config = ConfigDict(populate_by_name=True)
 
 
-class AuthorizationPolicySpec(BaseModel):
+class AuthorizationPolicySpec(FrozenModel):
     """AuthorizationPolicyResource defines the structure of an Istio AuthorizationPolicy Kubernetes resource."""
 
     action: Action = Action.allow
@@ -1,12 +1,17 @@
 # Copyright 2024 Canonical Ltd.
 # See LICENSE file for licensing details.
+import dataclasses
 import json
+import time
 from unittest.mock import patch
 
 import pytest
 import scenario
 from charms.istio_beacon_k8s.v0.service_mesh import Endpoint, MeshPolicy
 
+from charm import RECONCILE_CACHE_SECONDS
+from models import AuthorizationPolicySpec
+
 
 @pytest.fixture()
 def service_mesh_relation():
@@ -87,6 +92,16 @@ def test_build_authorization_policies(
         ]
         assert authorization_policies[1]["spec"]["targetRefs"][0]["name"] == "target-app2"
 
+        # The specs are built without pydantic, so check they match what AuthorizationPolicySpec would produce
+        for authorization_policy in authorization_policies:
+            spec = authorization_policy["spec"]
+            assert (
+                AuthorizationPolicySpec.model_validate(spec).model_dump(
+                    by_alias=True, exclude_unset=True, exclude_none=True
+                )
+                == spec
+            )
+
 
 @pytest.mark.parametrize("create_authorization_policies", [True, False])
 @patch("charm.IstioBeaconCharm._setup_proxy_pebble_service")
@@ -124,3 +139,92 @@ def test_charm_creates_authorization_policies_on_relation_changed(
     else:
         # Assert that we have passed exactly 0 AuthorizationPolicies in that list
         assert len(reconciler.call_args.args[0]) == 0
+
+
+@patch("charm.IstioBeaconCharm._setup_proxy_pebble_service")
+@patch("charm.IstioBeaconCharm._is_waypoint_deployment_ready", return_value=True)
+@patch("charm.IstioBeaconCharm._get_waypoint_resource_manager")
+@patch("charm.IstioBeaconCharm._get_authorization_policy_resource_manager")
+def test_charm_skips_reconcile_when_inputs_unchanged(
+    mock_get_authorization_policy_resource_manager,
+    _mock_get_waypoint_resource_manager,
+    _mock_is_waypoint_deployment_ready,
+    _mock_setup_proxy_pebble_service,
+    istio_beacon_context,
+    service_mesh_relation,
+):
+    """Test that a reconcile is skipped if nothing has changed since the last successful one."""
+    state = scenario.State(relations=[service_mesh_relation], leader=True)
+    reconciler = mock_get_authorization_policy_resource_manager.return_value.reconcile
+
+    state = istio_beacon_context.run(istio_beacon_context.on.config_changed(), state=state)
+    assert state.unit_status == scenario.ActiveStatus()
+    reconciler.assert_called_once()
+
+    # Nothing changed, so we should not reconcile again
+    state = istio_beacon_context.run(istio_beacon_context.on.config_changed(), state=state)
+    reconciler.assert_called_once()
+
+    # Once the last reconcile is old enough we should reconcile again anyway, to repair any out-of-band changes
+    with patch("charm.time.time", return_value=time.time() + RECONCILE_CACHE_SECONDS):
+        state = istio_beacon_context.run(istio_beacon_context.on.config_changed(), state=state)
+    assert reconciler.call_count == 2
+
+    # Changing the config should trigger a reconcile
+    state = dataclasses.replace(state, config={"manage-authorization-policies": False})
+    istio_beacon_context.run(istio_beacon_context.on.config_changed(), state=state)
+    assert reconciler.call_count == 3
+
+
+@patch("charm.ServiceMeshProvider.mesh_info")
+@patch("charm.IstioBeaconCharm._setup_proxy_pebble_service")
+@patch("charm.IstioBeaconCharm._is_waypoint_deployment_ready", return_value=True)
+@patch("charm.IstioBeaconCharm._get_waypoint_resource_manager")
+@patch("charm.IstioBeaconCharm._get_authorization_policy_resource_manager")
+def test_charm_does_not_read_mesh_when_authorization_policies_disabled(
+    _mock_get_authorization_policy_resource_manager,
+    _mock_get_waypoint_resource_manager,
+    _mock_is_waypoint_deployment_ready,
+    _mock_setup_proxy_pebble_service,
+    mock_mesh_info,
+    istio_beacon_context,
+    service_mesh_relation,
+):
+    """Test that the mesh relation data is not read when manage-authorization-policies is false."""
+    state = scenario.State(
+        relations=[service_mesh_relation],
+        leader=True,
+        config={"manage-authorization-policies": False},
+    )
+
+    state = istio_beacon_context.run(istio_beacon_context.on.config_changed(), state=state)
+    assert state.unit_status == scenario.ActiveStatus()
+    mock_mesh_info.assert_not_called()
+
+
+@patch("charm.IstioBeaconCharm._is_waypoint_deployment_ready", return_value=True)
+@patch("charm.IstioBeaconCharm._get_waypoint_resource_manager")
+@patch("charm.IstioBeaconCharm._get_authorization_policy_resource_manager")
+def test_charm_restores_pebble_layer_when_inputs_unchanged(
+    mock_get_authorization_policy_resource_manager,
+    _mock_get_waypoint_resource_manager,
+    _mock_is_waypoint_deployment_ready,
+    istio_beacon_context,
+):
+    """Test that a skipped reconcile still re-adds the Pebble layer after the workload container restarts."""
+    container = scenario.Container("metrics-proxy", can_connect=True)
+    state = scenario.State(containers=[container], leader=True)
+
+    state = istio_beacon_context.run(istio_beacon_context.on.pebble_ready(container), state=state)
+    assert "metrics-proxy" in state.get_container("metrics-proxy").layers
+    mock_get_authorization_policy_resource_manager.return_value.reconcile.assert_called_once()
+
+    # Simulate the container restarting, which loses its Pebble layers
+    container = dataclasses.replace(state.get_container("metrics-proxy"), layers={})
+    state = dataclasses.replace(state, containers=[container])
+
+    state = istio_beacon_context.run(istio_beacon_context.on.pebble_ready(container), state=state)
+    assert "metrics-proxy" in state.get_container("metrics-proxy").layers
+    # The Kubernetes resources were unchanged, so they were not reconciled again
+    mock_get_authorization_policy_resource_manager.return_value.reconcile.assert_called_once()
+    assert state.unit_status == scenario.ActiveStatus()
@@ -2,15 +2,31 @@
 
 # Copyright 2024 Canonical Ltd.
 # See LICENSE file for licensing details.
+import hashlib
+import time
 from unittest.mock import MagicMock, patch
 
+import httpx
 import pytest
-from lightkube.models.meta_v1 import ObjectMeta
+from lightkube.core.exceptions import ApiError
+from lightkube.models.apps_v1 import DeploymentStatus
+from lightkube.models.meta_v1 import ObjectMeta, Status
+from lightkube.resources.apps_v1 import Deployment
 from lightkube.resources.core_v1 import Namespace
+from lightkube.types import PatchType
+from lightkube_extensions.batch import K8sApiError
 from ops.testing import Harness
 
-from charm import IstioBeaconCharm
+from charm import (
+    ConcurrentKubernetesResourceManager,
+    IstioBeaconCharm,
+    _DeadlineExceededError,
+    _hash_pydantic_model,
+    _HTTPStatusError,
+    _resource_type,
+)
 from lib.charms.istio_beacon_k8s.v0.service_mesh import Endpoint, MeshPolicy
+from models import From, Rule, Source
 
 
 @pytest.fixture()
@@ -22,12 +38,11 @@ def harness():
 
 
 @pytest.mark.parametrize(
-    "labels_before, patched, labels_after",
+    "labels_before, labels_delta",
     [
         (
             # Assert that, when there are no waypoint labels, the expected labels are added
             {},
-            True,
             {
                 "istio.io/use-waypoint": "istio-beacon-k8s-istio-system-waypoint",
                 "istio.io/dataplane-mode": "ambient",
@@ -35,31 +50,33 @@ def harness():
             },
         ),
         (
-            # Assert that existing labels get preserved on positive cases
+            # Assert that existing labels are left out of the patch
             {"foo": "bar"},
-            True,
             {
                 "istio.io/use-waypoint": "istio-beacon-k8s-istio-system-waypoint",
                 "istio.io/dataplane-mode": "ambient",
                 "charms.canonical.com/istio.io.waypoint.managed-by": "istio-beacon-k8s-istio-system",
-                "foo": "bar",
             },
         ),
         (
-            # Assert that, when we already manage the labels, they get updated
+            # Assert that, when we already manage the labels, only the missing ones get patched
             {
                 "istio.io/use-waypoint": "istio-beacon-k8s-istio-system-waypoint",
                 # "istio.io/dataplane-mode": "ambient",  # omitted for this case on purpose
                 "charms.canonical.com/istio.io.waypoint.managed-by": "istio-beacon-k8s-istio-system",
                 "foo": "bar",
             },
-            True,
+            {"istio.io/dataplane-mode": "ambient"},
+        ),
+        (
+            # Assert that, when the labels are already as expected, we do not patch
             {
                 "istio.io/use-waypoint": "istio-beacon-k8s-istio-system-waypoint",
                 "istio.io/dataplane-mode": "ambient",
                 "charms.canonical.com/istio.io.waypoint.managed-by": "istio-beacon-k8s-istio-system",
                 "foo": "bar",
             },
+            None,
         ),
         # Assert that, when we we do not manage the labels, they do not get updated
         (
@@ -68,13 +85,14 @@ def harness():
                 "istio.io/dataplane-mode": "ambient",  # omitted for this case on purpose
                 "foo": "bar",
             },
-            False,
-            "unused arg",
+            None,
         ),
     ],
 )
-def test_add_labels(harness: Harness[IstioBeaconCharm], labels_before, patched, labels_after):
-    """Test the _add_labels method with namespace labeling logic."""
+def test_reconcile_namespace_labels_add(
+    harness: Harness[IstioBeaconCharm], labels_before, labels_delta
+):
+    """Test _reconcile_namespace_labels when the labels are desired."""
     harness.begin()
     charm = harness.charm
 
@@ -88,18 +106,21 @@ def test_add_labels(harness: Harness[IstioBeaconCharm], labels_before, patched,
     with patch.object(
         charm.lightkube_client, "get", return_value=mock_namespace
     ) as mock_get, patch.object(charm.lightkube_client, "patch") as mock_patch:
-        charm._add_labels()
+        charm._reconcile_namespace_labels(desired=True)
         mock_get.assert_called_once_with(Namespace, "istio-system")
-        if patched:
-            mock_patch.assert_called_once_with(Namespace, "istio-system", mock_namespace)
-            assert mock_namespace.metadata.labels == labels_after
+        if labels_delta is not None:
+            mock_patch.assert_called_once_with(
+                Namespace,
+                "istio-system",
+                {"metadata": {"labels": labels_delta}},
+                patch_type=PatchType.MERGE,
+            )
         else:
             mock_patch.assert_not_called()
-            assert mock_namespace.metadata.labels == labels_before
 
 
 @pytest.mark.parametrize(
-    "labels_before, patched, labels_after",
+    "labels_before, labels_delta",
     [
         (
             # Scenario 1: Namespace labels are managed by this charm
@@ -109,9 +130,7 @@ def test_add_labels(harness: Harness[IstioBeaconCharm], labels_before, patched,
                 "charms.canonical.com/istio.io.waypoint.managed-by": "istio-beacon-k8s-istio-system",
                 "foo": "bar",
             },
-            True,
             {
-                "foo": "bar",
                 "istio.io/use-waypoint": None,
                 "istio.io/dataplane-mode": None,
                 "charms.canonical.com/istio.io.waypoint.managed-by": None,
@@ -124,12 +143,7 @@ def test_add_labels(harness: Harness[IstioBeaconCharm], labels_before, patched,
                 "istio.io/dataplane-mode": "ambient",
                 "foo": "bar",
             },
-            False,
-            {
-                "istio.io/use-waypoint": "another-entity",
-                "istio.io.dataplane-mode": "ambient",
-                "foo": "bar",
-            },
+            None,
         ),
         (
             # Scenario 3: Namespace labels are partially managed by this charm
@@ -137,24 +151,24 @@ def test_add_labels(harness: Harness[IstioBeaconCharm], labels_before, patched,
                 "charms.canonical.com/istio.io.waypoint.managed-by": "istio-beacon-k8s-istio-system",
                 "foo": "bar",
             },
-            True,
-            {
-                "foo": "bar",
-                "istio.io/use-waypoint": None,
-                "istio.io/dataplane-mode": None,
-                "charms.canonical.com/istio.io.waypoint.managed-by": None,
-            },
+            {"charms.canonical.com/istio.io.waypoint.managed-by": None},
         ),
         (
             # Scenario 4: Namespace has no labels configured at all
             {},
-            False,
-            {},
+            None,
+        ),
+        (
+            # Scenario 5: Namespace has labels, but none of the Istio ones
+            {"foo": "bar"},
+            None,
         ),
     ],
 )
-def test_remove_labels(harness: Harness[IstioBeaconCharm], labels_before, patched, labels_after):
-    """Test the _remove_labels method with namespace labeling logic."""
+def test_reconcile_namespace_labels_remove(
+    harness: Harness[IstioBeaconCharm], labels_before, labels_delta
+):
+    """Test _reconcile_namespace_labels when the labels are not desired."""
     harness.begin()
     charm = harness.charm
 
@@ -168,56 +182,158 @@ def test_remove_labels(harness: Harness[IstioBeaconCharm], labels_before, patche
     with patch.object(
         charm.lightkube_client, "get", return_value=mock_namespace
     ) as mock_get, patch.object(charm.lightkube_client, "patch") as mock_patch:
-        charm._remove_labels()
+        charm._reconcile_namespace_labels(desired=False)
         mock_get.assert_called_once_with(Namespace, "istio-system")
-        if patched:
-            mock_patch.assert_called_once_with(Namespace, "istio-system", mock_namespace)
-            assert mock_namespace.metadata.labels == labels_after
+        if labels_delta is not None:
+            mock_patch.assert_called_once_with(
+                Namespace,
+                "istio-system",
+                {"metadata": {"labels": labels_delta}},
+                patch_type=PatchType.MERGE,
+            )
         else:
             mock_patch.assert_not_called()
-            assert mock_namespace.metadata.labels == labels_before
 
 
-def test_sync_waypoint_resources_add_labels(harness: Harness[IstioBeaconCharm]):
-    """Test _sync_waypoint_resources when model-on-mesh is True."""
+def _deployment(replicas, ready_replicas):
+    return MagicMock(
+        spec=Deployment,
+        status=DeploymentStatus(replicas=replicas, readyReplicas=ready_replicas),
+    )
+
+
+def _watch_events(*events, error=None):
+    """Yield watch events, then raise `error` as lightkube does when the watch fails."""
+    yield from events
+    if error is not None:
+        raise error
+
+
+@pytest.mark.parametrize(
+    "events, expected",
+    [
+        # Deployment is already ready when the watch starts
+        ([("ADDED", _deployment(1, 1))], True),
+        # Deployment becomes ready after a modification
+        ([("ADDED", _deployment(1, 0)), ("MODIFIED", _deployment(1, 1))], True),
+        # A deleted deployment is never ready
+        ([("DELETED", _deployment(1, 1))], False),
+    ],
+)
+def test_is_waypoint_deployment_ready(harness: Harness[IstioBeaconCharm], events, expected):
+    """Test that _is_waypoint_deployment_ready reports readiness from the deployment watch."""
+    harness.begin()
+    charm = harness.charm
+
+    with patch.object(
+        charm.lightkube_client, "watch", return_value=_watch_events(*events)
+    ) as mock_watch, patch.object(charm.lightkube_client, "get") as mock_get:
+        assert charm._is_waypoint_deployment_ready() is expected
+        mock_watch.assert_called_once()
+        mock_get.assert_not_called()
+
+
+def test_is_waypoint_deployment_ready_times_out(harness: Harness[IstioBeaconCharm]):
+    """Test that _is_waypoint_deployment_ready gives up after ready-timeout seconds."""
+    harness.update_config({"ready-timeout": 1})
     harness.begin()
-    harness.update_config({"model-on-mesh": True})
     charm = harness.charm
 
-    with patch.object(charm, "_get_waypoint_resource_manager") as mock_krm, patch.object(
-        charm, "_construct_waypoint"
-    ) as mock_construct_waypoint, patch.object(
-        charm, "_add_labels"
-    ) as mock_add_labels, patch.object(charm, "_remove_labels") as mock_remove_labels:
-        mock_krm.return_value.reconcile = MagicMock()
-        mock_construct_waypoint.return_value = MagicMock()
+    def _blocking_watch(*_args, **_kwargs):
+        yield "ADDED", _deployment(1, 0)
+        time.sleep(10)
+        yield "MODIFIED", _deployment(1, 1)
 
-        charm._sync_waypoint_resources()
+    with patch.object(charm.lightkube_client, "watch", side_effect=_blocking_watch):
+        start = time.monotonic()
+        assert charm._is_waypoint_deployment_ready() is False
+        assert time.monotonic() - start < 5
 
-        # Ensure resource manager and waypoint construction were called
-        mock_krm.return_value.reconcile.assert_called_once()
-        mock_construct_waypoint.assert_called_once()
 
-        # Ensure add_labels is called since model-on-mesh is True
-        mock_add_labels.assert_called_once()
+def test_is_waypoint_deployment_ready_falls_back_to_get(harness: Harness[IstioBeaconCharm]):
+    """Test that _is_waypoint_deployment_ready checks the deployment once if it cannot be watched."""
+    harness.begin()
+    charm = harness.charm
+
+    # Like lightkube's watch generator, raise the plain HTTP status error from resp.raise_for_status() on first use
+    rejected = _HTTPStatusError(
+        "Client error '403 Forbidden'", request=MagicMock(), response=MagicMock(status_code=403)
+    )
+    with patch.object(
+        charm.lightkube_client, "watch", return_value=_watch_events(error=rejected)
+    ), patch.object(charm.lightkube_client, "get", return_value=_deployment(1, 1)) as mock_get:
+        assert charm._is_waypoint_deployment_ready() is True
+        mock_get.assert_called_once()
+
 
-        # Ensure remove_labels is not called
-        mock_remove_labels.assert_not_called()
+def test_is_waypoint_deployment_ready_closes_watch_on_timeout(harness: Harness[IstioBeaconCharm]):
+    """Test that _is_waypoint_deployment_ready closes the watch when it gives up waiting."""
+    harness.update_config({"ready-timeout": 1})
+    harness.begin()
+    charm = harness.charm
 
+    watch = MagicMock()
+    watch.__iter__.return_value = iter([("ADDED", _deployment(0, 1))])
+    with patch.object(charm.lightkube_client, "watch", return_value=watch), patch(
+        "charm._is_deployment_ready", side_effect=_DeadlineExceededError
+    ):
+        assert charm._is_waypoint_deployment_ready() is False
+        watch.close.assert_called_once()
 
-def test_sync_waypoint_resources_remove_labels(harness: Harness[IstioBeaconCharm]):
-    """Test _sync_waypoint_resources when model-on-mesh is False."""
+
+def test_is_waypoint_deployment_ready_restarts_expired_watch(harness: Harness[IstioBeaconCharm]):
+    """Test that _is_waypoint_deployment_ready restarts the watch after a 410 Gone mid-stream."""
     harness.begin()
-    harness.update_config({"model-on-mesh": False})
+    charm = harness.charm
+
+    expired = ApiError(status=Status(code=410, message="too old resource version"))
+    with patch.object(
+        charm.lightkube_client,
+        "watch",
+        side_effect=[
+            _watch_events(("ADDED", _deployment(0, 1)), error=expired),
+            _watch_events(("ADDED", _deployment(1, 1))),
+        ],
+    ) as mock_watch, patch.object(charm.lightkube_client, "get") as mock_get:
+        assert charm._is_waypoint_deployment_ready() is True
+        assert mock_watch.call_count == 2
+        mock_get.assert_not_called()
+
+
+def test_is_waypoint_deployment_ready_falls_back_to_get_on_stream_error(
+    harness: Harness[IstioBeaconCharm],
+):
+    """Test that _is_waypoint_deployment_ready checks the deployment once after a non-410 ERROR event."""
+    harness.begin()
+    charm = harness.charm
+
+    error = ApiError(status=Status(code=500, message="internal error"))
+    with patch.object(
+        charm.lightkube_client,
+        "watch",
+        return_value=_watch_events(("ADDED", _deployment(0, 1)), error=error),
+    ) as mock_watch, patch.object(
+        charm.lightkube_client, "get", return_value=_deployment(1, 1)
+    ) as mock_get:
+        assert charm._is_waypoint_deployment_ready() is True
+        mock_watch.assert_called_once()
+        mock_get.assert_called_once()
+
+
+@pytest.mark.parametrize("model_on_mesh", [True, False])
+def test_sync_waypoint_resources_labels(harness: Harness[IstioBeaconCharm], model_on_mesh):
+    """Test _sync_waypoint_resources reconciles the namespace labels according to model-on-mesh."""
+    harness.begin()
+    harness.update_config({"model-on-mesh": model_on_mesh})
     charm = harness.charm
 
     with patch.object(charm, "_get_waypoint_resource_manager") as mock_krm, patch.object(
         charm, "_construct_waypoint"
     ) as mock_construct_waypoint, patch.object(
-        charm, "_add_labels"
-    ) as mock_add_labels, patch.object(charm, "_remove_labels") as mock_remove_labels:
+        charm, "_reconcile_namespace_labels"
+    ) as mock_reconcile_namespace_labels:
         mock_krm.return_value.reconcile = MagicMock()
-        mock_construct_waypoint.return_value = MagicMock()
+        mock_construct_waypoint.return_value.to_dict.return_value = {}
 
         charm._sync_waypoint_resources()
 
@@ -225,11 +341,67 @@ def test_sync_waypoint_resources_remove_labels(harness: Harness[IstioBeaconCharm
         mock_krm.return_value.reconcile.assert_called_once()
         mock_construct_waypoint.assert_called_once()
 
-        # Ensure remove_labels is called since model-on-mesh is False
-        mock_remove_labels.assert_called_once()
+        # Ensure the labels are added if model-on-mesh is True, and removed otherwise
+        mock_reconcile_namespace_labels.assert_called_once_with(desired=model_on_mesh)
+
+
+@pytest.mark.parametrize(
+    "ready_seconds_ago, applied",
+    [
+        # Recently confirmed ready, so we skip applying the unchanged waypoint
+        (10, False),
+        # Confirmed ready too long ago, so we apply it and check it again
+        (3600, True),
+    ],
+)
+def test_sync_waypoint_resources_skips_unchanged_waypoint(
+    harness: Harness[IstioBeaconCharm], ready_seconds_ago, applied
+):
+    """Test that _sync_waypoint_resources skips an unchanged waypoint that was recently ready."""
+    harness.begin()
+    charm = harness.charm
+
+    with patch.object(charm, "_get_waypoint_resource_manager") as mock_krm, patch.object(
+        charm, "_reconcile_namespace_labels"
+    ):
+        # Sync once to learn the waypoint's fingerprint, then mark it as confirmed ready
+        fingerprint = charm._sync_waypoint_resources()
+        assert fingerprint is not None
+        charm._stored.waypoint_fingerprint = fingerprint
+        charm._stored.waypoint_ready_at = time.time() - ready_seconds_ago
+        mock_krm.return_value.reconcile.reset_mock()
+
+        result = charm._sync_waypoint_resources()
+
+        if applied:
+            assert result == fingerprint
+            mock_krm.return_value.reconcile.assert_called_once()
+        else:
+            assert result is None
+            mock_krm.return_value.reconcile.assert_not_called()
+
+
+def test_hash_pydantic_model():
+    """Test that _hash_pydantic_model is stable for a given model."""
+    mesh_policy = MeshPolicy(
+        source_app_name="senderApp",
+        source_namespace="senderNamespace",
+        target_app_name="targetApp",
+        target_namespace="targetNamespace",
+        target_service=None,
+        endpoints=[Endpoint(hosts=["host1"], ports=[80], methods=["GET"], paths=["/path1"])],
+    )
+    # Note: if this test fails because the hash has changed, that means upgrading from a previous version to this one
+    # will result in a delete/recreate of all policies.  Decide if that is acceptable.
+    assert _hash_pydantic_model(mesh_policy) == "a081dd73"
+    assert _hash_pydantic_model(mesh_policy.model_copy()) == _hash_pydantic_model(mesh_policy)
 
-        # Ensure add_labels is not called
-        mock_add_labels.assert_not_called()
+
+def test_hash_pydantic_model_does_not_use_aliases():
+    """Test that _hash_pydantic_model hashes the same json as model_dump_json, which does not dump by alias."""
+    rule = Rule(from_=[From(source=Source(principals=["principal"]))])
+    expected = hashlib.blake2b(rule.model_dump_json().encode(), digest_size=4).hexdigest()
+    assert _hash_pydantic_model(rule) == expected
 
 
 @pytest.mark.parametrize(
@@ -251,7 +423,7 @@ def test_sync_waypoint_resources_remove_labels(harness: Harness[IstioBeaconCharm
             ),
             # Note: if this test fails because the hash has changed, that means upgrading from a previous version to
             # this one will result in a delete/recreate of all policies.  Decide if that is acceptable.
-            "beaconApp-beaconNamespace-policy-senderApp-senderNamespace-targetApp-65994572",
+            "beaconApp-beaconNamespace-policy-senderApp-senderNamespace-targetApp-a081dd73",
         ),
         # case with target service, multiple endpoints
         (
@@ -270,7 +442,7 @@ def test_sync_waypoint_resources_remove_labels(harness: Harness[IstioBeaconCharm
             ),
             # Note: if this test fails because the hash has changed, that means upgrading from a previous version to
             # this one will result in a delete/recreate of all policies.  Decide if that is acceptable.
-            "beaconApp-beaconNamespace-policy-senderApp-senderNamespace-targetApp-434ce4ee",
+            "beaconApp-beaconNamespace-policy-senderApp-senderNamespace-targetApp-ffb82bc9",
         ),
         # case with truncation
         (
@@ -289,7 +461,7 @@ def test_sync_waypoint_resources_remove_labels(harness: Harness[IstioBeaconCharm
             ),
             # Note: if this test fails because the hash has changed, that means upgrading from a previous version to
             # this one will result in a delete/recreate of all policies.  Decide if that is acceptable.
-            "beaconApp012345678901234567890123456789012345678901234567890123-beaconNamespace678901234567890123456789012345678901234567890123-policy-senderApp012345678901234567890-senderNamespace678901234567890-targetApp012345678901234567890-506b5a7c",
+            "beaconApp012345678901234567890123456789012345678901234567890123-beaconNamespace678901234567890123456789012345678901234567890123-policy-senderApp012345678901234567890-senderNamespace678901234567890-targetApp012345678901234567890-b9e8b035",
         ),
     ],
 )
@@ -305,3 +477,80 @@ def test_generate_authorization_policy_name(
     name = charm._generate_authorization_policy_name(mesh_policy)
     assert name == expected_name
     assert len(name) <= 253  # 253 is the max length for a k8s resource name
+
+
+def test_build_authorization_policies_does_not_share_model_operator_spec(
+    harness: Harness[IstioBeaconCharm],
+):
+    """Test that each build gets its own copy of the model operator AuthorizationPolicy spec."""
+    harness.update_config({"model-on-mesh": True})
+    harness.begin()
+    charm = harness.charm
+
+    first = charm._build_authorization_policies([])[-1]
+    first.spec["selector"]["matchLabels"]["mutated"] = "true"
+    second = charm._build_authorization_policies([])[-1]
+
+    assert second.spec is not first.spec
+    assert second.spec["selector"]["matchLabels"] == {"operator.juju.is/name": "modeloperator"}
+
+
+def _authorization_policy(name):
+    return _resource_type("AuthorizationPolicy")(
+        metadata=ObjectMeta(name=name, namespace="istio-system"), spec={}
+    )
+
+
+def test_concurrent_resource_manager_reconcile():
+    """Test that ConcurrentKubernetesResourceManager deletes stale resources and patches each desired one."""
+    client = MagicMock()
+    client.list.return_value = [_authorization_policy("stale"), _authorization_policy("kept")]
+    krm = ConcurrentKubernetesResourceManager(
+        labels={"foo": "bar"},
+        resource_types={_resource_type("AuthorizationPolicy")},
+        lightkube_client=client,
+        max_workers=2,
+    )
+
+    krm.reconcile([_authorization_policy(name) for name in ("kept", "new1", "new2")])
+
+    client.delete.assert_called_once_with(
+        res=_resource_type("AuthorizationPolicy"), name="stale", namespace="istio-system"
+    )
+    patched = sorted(call.kwargs["obj"].metadata.name for call in client.patch.call_args_list)
+    assert patched == ["kept", "new1", "new2"]
+    assert all(
+        call.kwargs["patch_type"] == PatchType.APPLY for call in client.patch.call_args_list
+    )
+
+
+def test_concurrent_resource_manager_reconcile_raises_on_patch_error():
+    """Test that ConcurrentKubernetesResourceManager re-raises errors raised while patching."""
+    client = MagicMock()
+    client.list.return_value = []
+    client.patch.side_effect = ApiError(status=Status(code=500, message="boom"))
+    krm = ConcurrentKubernetesResourceManager(
+        labels={"foo": "bar"},
+        resource_types={_resource_type("AuthorizationPolicy")},
+        lightkube_client=client,
+        max_workers=2,
+    )
+
+    with pytest.raises(ApiError):
+        krm.reconcile([_authorization_policy(name) for name in ("new1", "new2")])
+
+
+def test_concurrent_resource_manager_reconcile_raises_k8s_api_error_on_transport_error():
+    """Test that ConcurrentKubernetesResourceManager keeps the upstream K8sApiError for transport errors."""
+    client = MagicMock()
+    client.list.return_value = []
+    client.patch.side_effect = httpx.ConnectError("unreachable")
+    krm = ConcurrentKubernetesResourceManager(
+        labels={"foo": "bar"},
+        resource_types={_resource_type("AuthorizationPolicy")},
+        lightkube_client=client,
+        max_workers=2,
+    )
+
+    with pytest.raises(K8sApiError):
+        krm.reconcile([_authorization_policy(name) for name in ("new1", "new2")])